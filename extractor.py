@@ -1,11 +1,24 @@
 import os
+import asyncio
 import json
 import base64
+import functools
 import io
-from typing import Dict, Any, List, Tuple, Optional
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple, Optional, Union
 
-from openai import OpenAI
-import pypdfium2 as pdfium
+import orjson
+
+# openai/httpx and pypdfium2 are imported where they are first needed, so
+# importing this module (e.g. for TEMPLATE_REGISTRY) stays cheap.
+if TYPE_CHECKING:
+  from openai import AsyncOpenAI, OpenAI
+  import pypdfium2 as pdfium
 
 
 # path to templates folder (relative to this file)
@@ -123,6 +136,17 @@ TEMPLATE_REGISTRY: Dict[str, Dict[str, str]] = {
 }
 
 
+# Distinct document types in registry order (dict.fromkeys de-duplicates),
+# plus a markdown bullet list of them for the UI. Built once at import;
+# unlike the Streamlit script, this module is not re-executed on reruns.
+SUPPORTED_DOCUMENT_TYPES: Tuple[str, ...] = tuple(dict.fromkeys(
+  cfg["document_type"]
+  for cfg in TEMPLATE_REGISTRY.values()
+  if cfg.get("document_type")
+))
+SUPPORTED_DOCS_MD = "\n".join(f"- {doc}" for doc in SUPPORTED_DOCUMENT_TYPES)
+
+
 # Logical model aliases for this extractor (OpenAI ChatGPT models).
 ALLOWED_MODELS = [
   "default",
@@ -140,10 +164,103 @@ ALLOWED_MODELS = [
 DEFAULT_MODEL = os.getenv("EXTRACTOR_MODEL_ALIAS", "gpt-4.1-mini")
 
 OPENAI_API_KEY_ENV = "OPENAI_API_KEY"
-_openai_client: Optional[OpenAI] = None
+_openai_client: Optional["OpenAI"] = None
+_async_openai_client: Optional["AsyncOpenAI"] = None
+# Event loop (on a daemon thread) that owns the async client and its pool.
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_lock = threading.Lock()
+# Keep-alive pool for the shared OpenAI HTTP client.
+OPENAI_MAX_CONNECTIONS = 100
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 20
+OPENAI_KEEPALIVE_EXPIRY = 60
+
+# Opt-in page chunking: when set, documents longer than PAGES_PER_REQUEST
+# pages are split into chunks requested concurrently (at most
+# MAX_CONCURRENT_REQUESTS in flight) and merged back together. Each chunk
+# only sees its own pages, so 0 (the default) sends every page in one request.
+PAGES_PER_REQUEST = max(0, int(os.getenv("EXTRACTOR_PAGES_PER_REQUEST", "0")))
+MAX_CONCURRENT_REQUESTS = max(
+  1,
+  int(os.getenv("EXTRACTOR_MAX_CONCURRENT_REQUESTS", "4")),
+)
+
+# Seconds between status checks while waiting on an OpenAI batch.
+BATCH_POLL_INTERVAL = float(os.getenv("EXTRACTOR_BATCH_POLL_SECONDS", "30"))
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+# Longest a blocking batch call waits before cancelling the batch; kept under
+# the 15-minute Lambda limit. Use submit/collect to wait longer.
+BATCH_MAX_WAIT = float(os.getenv("EXTRACTOR_BATCH_MAX_WAIT_SECONDS", "600"))
+
+# Longest rendered image edge in pixels (OpenAI vision input limit).
+MAX_IMAGE_EDGE = 2048
+
+# Text-only document types whose pages are rendered in grayscale, for the
+# model and for the UI preview alike (see renders_in_grayscale). Photo IDs
+# (passport, visa) and unmatched files stay in colour.
+GRAYSCALE_DOCUMENT_TYPES = frozenset({
+  "Academic Transcript",
+  "Employment Letter",
+  "Resume/CV",
+  "Corporate Tax Returns",
+})
+GRAYSCALE_QUALITY = 55
+
+# Page image encodings: PIL save options and data-URL MIME type.
+IMAGE_FORMATS: Dict[str, Dict[str, Any]] = {
+  "JPEG": {
+    "mime_type": "image/jpeg",
+    "save_options": {"optimize": True, "progressive": True},
+  },
+  "WEBP": {
+    "mime_type": "image/webp",
+    # method=2 keeps most of method=4's size win at about half the encode
+    # time (3 text pages: ~17% smaller than JPEG, 0.36 s vs 0.66 s).
+    "save_options": {"method": 2},
+  },
+}
+
+# Encoding for page images sent to the model (a key of IMAGE_FORMATS).
+# JPEG is the cheapest to encode; WEBP (accepted by every ALLOWED_MODELS
+# entry) is ~17% smaller on the wire for ~1.8x the encode CPU time.
+PAGE_IMAGE_FORMAT = os.getenv("EXTRACTOR_IMAGE_FORMAT", "JPEG").upper()
+if PAGE_IMAGE_FORMAT not in IMAGE_FORMATS:
+  raise ValueError(
+    f"Unsupported EXTRACTOR_IMAGE_FORMAT '{PAGE_IMAGE_FORMAT}'. "
+    f"Supported values: {list(IMAGE_FORMATS)}"
+  )
+
+
+def _available_cpus() -> int:
+  # sched_getaffinity honours cpusets (container CPU limits); cpu_count()
+  # reports the host's cores.
+  if hasattr(os, "sched_getaffinity"):
+    return len(os.sched_getaffinity(0))
+  return os.cpu_count() or 1
+
+
+# Processes used to render PDF pages; 1 renders in the calling process. Each
+# worker is a separate interpreter holding its own copy of the PDF, so the
+# default stays small even on large hosts.
+MAX_DEFAULT_RENDER_WORKERS = 4
+RENDER_WORKERS = max(
+  1,
+  int(os.getenv("EXTRACTOR_RENDER_WORKERS", "0"))
+  or min(_available_cpus(), MAX_DEFAULT_RENDER_WORKERS),
+)
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+# PDFium is not thread-safe anywhere in a process, not even across separate
+# documents, so every in-process PDFium call (here and in the UI) holds this.
+PDFIUM_LOCK = threading.RLock()
 
 
+@functools.lru_cache(maxsize=None)
 def load_template(template_file: str) -> Dict[str, Any]:
+  """
+  Load and parse a template JSON file. Templates are static for the life of
+  the process, so each file is read once and the parsed dict is shared;
+  callers must treat the returned value as read-only.
+  """
   path = os.path.join(TEMPLATES_DIR, template_file)
   if not os.path.exists(path):
     raise FileNotFoundError(f"Template not found: {path}")
@@ -151,74 +268,329 @@ def load_template(template_file: str) -> Dict[str, Any]:
     return json.load(fh)
 
 
-def infer_template_from_filename(filename: str) -> Tuple[str, Dict[str, Any]]:
+# Registry keywords in match-priority order (longest first, so the most
+# specific keyword wins; ties keep registry order), and one regex that finds
+# every keyword occurrence (overlapping, via lookahead) in a single scan.
+_KEYWORDS: Tuple[str, ...] = tuple(sorted(TEMPLATE_REGISTRY, key=len, reverse=True))
+_KEYWORD_RANK: Dict[str, int] = {kw: rank for rank, kw in enumerate(_KEYWORDS)}
+_KEYWORD_RE = re.compile(
+  "(?=(" + "|".join(re.escape(kw) for kw in _KEYWORDS) + "))"
+)
+
+
+def detect_template(filename: str) -> Optional[str]:
   """
-  Look at the PDF file name and decide which document_type + template to use.
+  Return the TEMPLATE_REGISTRY keyword that routes this filename, or None
+  when no keyword matches. Cheap enough to call from the UI before an
+  extraction to reject filenames that would fail routing.
+  """
+  basename = os.path.basename(filename or "").lower()
+  hits = [m.group(1) for m in _KEYWORD_RE.finditer(basename)]
+  if not hits:
+    return None
+  return min(hits, key=_KEYWORD_RANK.__getitem__)
 
-  Example:
-    - 'I129 HALF.pdf'      -> matches 'i129' -> uses i129_h1b_petition.json
-    - 'passport_rohan.pdf' -> matches 'passport' -> uses passport.json
-    - 'F1_visa_page1.pdf'  -> matches 'visa' -> uses us_visa.json
-    - 'i94_record.pdf'     -> matches 'i94' -> uses i_94.json
+
+def renders_in_grayscale(filename: str) -> bool:
   """
-  basename = os.path.basename(filename).lower()
+  Colour policy shared by model input and the UI preview: grayscale only
+  for files routed to a GRAYSCALE_DOCUMENT_TYPES template.
+  """
+  keyword = detect_template(filename)
+  return (
+    keyword is not None
+    and TEMPLATE_REGISTRY[keyword]["document_type"] in GRAYSCALE_DOCUMENT_TYPES
+  )
 
-  for keyword, cfg in TEMPLATE_REGISTRY.items():
-    if keyword in basename:
-      document_type = cfg["document_type"]
-      template = load_template(cfg["template_file"])
-      return document_type, template
+
+def _match_template_config(filename: str) -> Dict[str, str]:
+  keyword = detect_template(filename)
+  if keyword is not None:
+    return TEMPLATE_REGISTRY[keyword]
 
   # fallback: raise to force user to add mapping or rename file
+  basename = os.path.basename(filename).lower()
   raise ValueError(
     f"Could not infer document type from filename '{basename}'. "
     f"Known keywords: {list(TEMPLATE_REGISTRY.keys())}"
   )
 
 
-def pdf_bytes_to_base64_images(pdf_bytes: bytes, max_pages: int = 10) -> List[str]:
+def infer_template_from_filename(filename: str) -> Tuple[str, Dict[str, Any]]:
   """
-  Render each page of the PDF bytes to a JPEG image and return a list of
-  base64-encoded image strings (no data URL prefix). Limit pages by max_pages.
+  Look at the PDF file name and decide which document_type + template to use.
+
+  Example:
+    - 'I129 HALF.pdf'      -> matches 'i129' -> uses i129_h1b_petition.json
+    - 'passport_rohan.pdf' -> matches 'passport' -> uses passport.json
+    - 'F1_visa_page1.pdf'  -> matches 'visa' -> uses us_visa.json
+    - 'i94_record.pdf'     -> matches 'i94' -> uses i_94.json
   """
-  pdf = pdfium.PdfDocument(pdf_bytes)
-  images: List[str] = []
+  cfg = _match_template_config(filename)
+  return cfg["document_type"], load_template(cfg["template_file"])
+
+
+def _encode_page(
+  page: Any,
+  scale: float,
+  quality: int,
+  grayscale: bool,
+  image_format: str,
+  buffered: io.BytesIO,
+) -> str:
+  # Anything beyond the model's input resolution is downscaled server-side,
+  # so lower the render scale until the longest edge fits MAX_IMAGE_EDGE.
+  scale = min(scale, MAX_IMAGE_EDGE / max(page.get_size()))
+
+  # PIL can only wrap (not copy) 4-byte RGBX and single-channel L bitmaps,
+  # so ask PDFium for RGBX (rev_byteorder + prefer_bgrx); grayscale pages
+  # come back as L. JPEG and WebP both encode RGBX directly.
+  bitmap = page.render(
+    scale=scale,
+    rev_byteorder=True,
+    prefer_bgrx=True,
+    grayscale=grayscale,
+  )
+  pil_image = bitmap.to_pil()
+
+  # Overwrite from the start and only then cut off the previous page's
+  # tail: truncating an empty buffer would free its allocation, so every
+  # page would regrow it from zero instead of reusing it.
+  buffered.seek(0)
+  fmt = IMAGE_FORMATS[image_format]
+  pil_image.save(
+    buffered,
+    format=image_format,
+    quality=quality,
+    **fmt["save_options"],
+  )
+  buffered.truncate()
+  with buffered.getbuffer() as view:
+    data_url = (
+      f"data:{fmt['mime_type']};base64," + base64.b64encode(view).decode("ascii")
+    )
+
+  pil_image.close()
+  bitmap.close()
+  return data_url
+
+
+def _encode_pages(
+  pdf: Any,
+  start: int,
+  stop: int,
+  scale: float,
+  quality: int,
+  grayscale: bool,
+  image_format: str,
+) -> List[str]:
+  # One scratch buffer per range; each page rewinds it instead of
+  # allocating and growing a fresh BytesIO.
+  buffered = io.BytesIO()
+  try:
+    return [
+      _encode_page(pdf[i], scale, quality, grayscale, image_format, buffered)
+      for i in range(start, stop)
+    ]
+  finally:
+    buffered.close()
+
+
+def _render_page_range(
+  pdf_source: Union[bytes, str],
+  start: int,
+  stop: int,
+  scale: float,
+  quality: int,
+  grayscale: bool,
+  image_format: str,
+) -> List[str]:
+  """
+  Process-pool worker: PDFium documents cannot be pickled, so each worker
+  opens its own copy of the PDF (from bytes, or from a path) and encodes
+  pages [start, stop).
+  """
+  import pypdfium2 as pdfium
 
+  pdf = pdfium.PdfDocument(pdf_source)
   try:
-    total_pages = len(pdf)
-    if max_pages is not None and max_pages > 0:
-      page_count = min(total_pages, max_pages)
-    else:
-      page_count = total_pages
-
-    # Adaptive scale/quality to keep payloads manageable.
-    if page_count <= 2:
-      scale = 4.17   # ~300 DPI
-      quality = 80
-    elif page_count <= 10:
-      scale = 2.0    # ~145 DPI
-      quality = 60
-    else:
-      scale = 1.5    # ~110 DPI
-      quality = 60
-
-    for page_index in range(page_count):
-      page = pdf[page_index]
-      pil_image = page.render(scale=scale).to_pil()
-
-      buffered = io.BytesIO()
-      pil_image.save(buffered, format="JPEG", quality=quality)
-      img_b64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-      images.append(img_b64)
-
-      buffered.close()
-      pil_image.close()
+    return _encode_pages(
+      pdf, start, stop, scale, quality, grayscale, image_format
+    )
   finally:
     pdf.close()
 
+
+def _get_render_pool() -> ProcessPoolExecutor:
+  global _render_pool
+  with _render_pool_lock:
+    if _render_pool is None:
+      # spawn avoids forking a multi-threaded host process (e.g. Streamlit).
+      _render_pool = ProcessPoolExecutor(
+        max_workers=RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+      )
+    return _render_pool
+
+
+def _reset_render_pool(broken: ProcessPoolExecutor) -> None:
+  # Only drop the pool that actually broke; another thread may already have
+  # replaced it with a fresh one that other callers are using.
+  global _render_pool
+  with _render_pool_lock:
+    if _render_pool is broken:
+      _render_pool = None
+  broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_in_pool(
+  pool: ProcessPoolExecutor,
+  pdf_source: Union[bytes, str],
+  bounds: List[int],
+  scale: float,
+  quality: int,
+  grayscale: bool,
+  image_format: str,
+) -> List[str]:
+  futures = [
+    pool.submit(
+      _render_page_range,
+      pdf_source,
+      start,
+      stop,
+      scale,
+      quality,
+      grayscale,
+      image_format,
+    )
+    for start, stop in zip(bounds, bounds[1:])
+  ]
+
+  images: List[str] = []
+  for future in futures:
+    images.extend(future.result())
   return images
 
 
+def _pdf_source(
+  pdf_bytes: Optional[bytes],
+  pdf_path: Optional[str],
+) -> Union[bytes, str]:
+  if (pdf_bytes is None) == (pdf_path is None):
+    raise ValueError("Pass exactly one of pdf_bytes or pdf_path.")
+  return pdf_path if pdf_path is not None else pdf_bytes
+
+
+def _render_settings(
+  total_pages: int,
+  max_pages: Optional[int],
+  grayscale: bool,
+) -> Tuple[int, float, int]:
+  if max_pages is not None and max_pages > 0:
+    page_count = min(total_pages, max_pages)
+  else:
+    page_count = total_pages
+
+  # Adaptive scale/quality to keep payloads manageable.
+  if page_count <= 2:
+    scale = 4.17   # ~300 DPI
+    quality = 80
+  elif page_count <= 10:
+    scale = 2.0    # ~145 DPI
+    quality = 60
+  else:
+    scale = 1.5    # ~110 DPI
+    quality = 60
+
+  if grayscale:
+    quality = min(quality, GRAYSCALE_QUALITY)
+  return page_count, scale, quality
+
+
+def pdf_to_image_data_urls(
+  pdf_bytes: Optional[bytes],
+  max_pages: int = 10,
+  pdf: Optional["pdfium.PdfDocument"] = None,
+  grayscale: bool = False,
+  image_format: str = "JPEG",
+  pdf_path: Optional[str] = None,
+) -> List[str]:
+  """
+  Render each page of the PDF bytes to an image (JPEG by default, or any
+  key of IMAGE_FORMATS) and return a list of `data:image/...;base64,` URLs
+  ready to send as input images. Limit pages by max_pages. Pass `pdf_path`
+  (with pdf_bytes=None) for a PDF on disk: PDFium and each render worker
+  then load it from the file, whereas bytes are pickled to every worker.
+
+  Multi-page documents are rendered across up to RENDER_WORKERS processes,
+  one contiguous page range per worker. Alternatively pass an already-open
+  `pdf` (and neither bytes nor path): its pages are then rendered from that
+  handle in this process, under PDFIUM_LOCK, with no second parse; it is
+  left open for the caller. `grayscale` renders single-channel pages at a
+  lower quality, which is plenty for text-only documents and much smaller
+  on the wire.
+  """
+  if pdf is not None:
+    with PDFIUM_LOCK:
+      page_count, scale, quality = _render_settings(len(pdf), max_pages, grayscale)
+      return _encode_pages(
+        pdf, 0, page_count, scale, quality, grayscale, image_format
+      )
+
+  import pypdfium2 as pdfium
+
+  pdf_source = _pdf_source(pdf_bytes, pdf_path)
+  with PDFIUM_LOCK:
+    pdf = pdfium.PdfDocument(pdf_source)
+    try:
+      page_count, scale, quality = _render_settings(len(pdf), max_pages, grayscale)
+      workers = min(page_count, RENDER_WORKERS)
+      if workers <= 1:
+        return _encode_pages(
+          pdf, 0, page_count, scale, quality, grayscale, image_format
+        )
+    finally:
+      pdf.close()
+
+  bounds = [page_count * w // workers for w in range(workers + 1)]
+  render_args = (pdf_source, bounds, scale, quality, grayscale, image_format)
+  pool = _get_render_pool()
+  try:
+    return _render_in_pool(pool, *render_args)
+  except BrokenProcessPool:
+    # A worker died, usually PDFium crashing on a malformed PDF. Never fall
+    # back to rendering in this process (the same crash would take the host
+    # down); retry once on a fresh pool in case another document broke it.
+    _reset_render_pool(pool)
+
+  pool = _get_render_pool()
+  try:
+    return _render_in_pool(pool, *render_args)
+  except BrokenProcessPool as exc:
+    _reset_render_pool(pool)
+    raise RuntimeError(
+      "PDF rendering worker crashed; the PDF may be malformed or corrupt."
+    ) from exc
+
+
+def pdf_bytes_to_base64_images(
+  pdf_bytes: Optional[bytes],
+  max_pages: int = 10,
+  pdf_path: Optional[str] = None,
+) -> List[str]:
+  """
+  Legacy contract: render each page to JPEG and return plain base64 strings
+  (no data URL prefix). New code should use pdf_to_image_data_urls, which
+  skips the prefix strip (one extra copy per page).
+  """
+  return [
+    data_url.partition(",")[2]
+    for data_url in pdf_to_image_data_urls(
+      pdf_bytes, max_pages=max_pages, pdf_path=pdf_path
+    )
+  ]
+
+
 def build_extraction_prompt(document_type: str, template: Dict[str, Any]) -> str:
   """
   Build a prompt that instructs the model to extract data into the
@@ -231,7 +603,7 @@ Document Type: {document_type}
 
 Extract all information from the provided document image(s) and return it in the following exact JSON structure:
 
-{json.dumps(template, indent=2)}
+{orjson.dumps(template, option=orjson.OPT_INDENT_2).decode()}
 
 Instructions:
 - Output only valid JSON matching exactly the structure above
@@ -243,68 +615,120 @@ Instructions:
 """
 
 
-def _get_openai_client() -> OpenAI:
+@functools.lru_cache(maxsize=None)
+def _get_prompt(document_type: str, template_file: str) -> str:
+  """
+  Cached extraction prompt for a registered (document_type, template_file)
+  pair, so the template is serialized once per process.
+  """
+  return build_extraction_prompt(document_type, load_template(template_file))
+
+
+def _get_api_key() -> str:
+  api_key = os.getenv(OPENAI_API_KEY_ENV)
+  if not api_key:
+    raise RuntimeError(
+      f"{OPENAI_API_KEY_ENV} is not set. "
+      "Set it in your environment or CI secrets."
+    )
+  return api_key
+
+
+def _openai_http_limits() -> Any:
+  import httpx
+
+  return httpx.Limits(
+    max_connections=OPENAI_MAX_CONNECTIONS,
+    max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+  )
+
+
+def _get_openai_client() -> "OpenAI":
   global _openai_client
   if _openai_client is None:
-    api_key = os.getenv(OPENAI_API_KEY_ENV)
-    if not api_key:
-      raise RuntimeError(
-        f"{OPENAI_API_KEY_ENV} is not set. "
-        "Set it in your environment or CI secrets."
-      )
-    _openai_client = OpenAI(api_key=api_key)
+    import httpx
+    from openai import OpenAI
+
+    # One process-wide client with a keep-alive pool, so repeated
+    # extractions reuse warm TCP/TLS connections to the API.
+    _openai_client = OpenAI(
+      api_key=_get_api_key(),
+      http_client=httpx.Client(limits=_openai_http_limits()),
+    )
   return _openai_client
 
 
+def _get_async_loop() -> asyncio.AbstractEventLoop:
+  global _async_loop
+  with _async_lock:
+    if _async_loop is None:
+      # httpx async connections are bound to the loop that opened them, so
+      # the shared async client lives on one long-lived loop instead of a
+      # fresh asyncio.run() loop per extraction.
+      loop = asyncio.new_event_loop()
+      threading.Thread(
+        target=loop.run_forever,
+        name="openai-async",
+        daemon=True,
+      ).start()
+      _async_loop = loop
+  return _async_loop
+
+
+def _get_async_openai_client() -> "AsyncOpenAI":
+  # Only called on the _get_async_loop() thread, so no locking is needed.
+  global _async_openai_client
+  if _async_openai_client is None:
+    import httpx
+    from openai import AsyncOpenAI
+
+    _async_openai_client = AsyncOpenAI(
+      api_key=_get_api_key(),
+      http_client=httpx.AsyncClient(limits=_openai_http_limits()),
+    )
+  return _async_openai_client
+
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+  # SDK response objects keep their fields in __dict__; raw API bodies are dicts.
+  return obj if isinstance(obj, dict) else getattr(obj, "__dict__", {})
+
+
 def _extract_text_from_response(response: Any) -> str:
   output_text = getattr(response, "output_text", None)
   if isinstance(output_text, str) and output_text.strip():
     return output_text.strip()
 
-  output = getattr(response, "output", None)
+  output = _as_dict(response).get("output")
   if isinstance(output, list):
-    parts: List[str] = []
-    for item in output:
-      content = getattr(item, "content", None)
-      if content is None and isinstance(item, dict):
-        content = item.get("content")
-      if isinstance(content, list):
-        for block in content:
-          if isinstance(block, dict):
-            block_type = block.get("type")
-            if block_type in ("output_text", "text"):
-              parts.append(block.get("text", ""))
-          else:
-            block_type = getattr(block, "type", None)
-            if block_type in ("output_text", "text"):
-              parts.append(getattr(block, "text", ""))
-    return "".join(parts).strip()
+    blocks = (
+      _as_dict(block)
+      for item in output
+      for block in _as_dict(item).get("content") or ()
+    )
+    return "".join(
+      block.get("text") or ""
+      for block in blocks
+      if block.get("type") in ("output_text", "text")
+    ).strip()
 
   return ""
 
 
-def _invoke_openai(prompt: str, images: List[str], model: str) -> Any:
+def _build_request(prompt: str, images: List[str], model: str) -> Dict[str, Any]:
   """
-  Call OpenAI ChatGPT with the given prompt + images and return the response.
+  Build the Responses API request body for the given prompt + images.
   """
-  client = _get_openai_client()
-
   user_content: List[Dict[str, Any]] = [
     {"type": "input_text", "text": prompt},
+    *({"type": "input_image", "image_url": img_url} for img_url in images),
   ]
 
-  for img_b64 in images:
-    user_content.append(
-      {
-        "type": "input_image",
-        "image_url": f"data:image/jpeg;base64,{img_b64}",
-      }
-    )
-
-  return client.responses.create(
-    model=model,
-    temperature=0,
-    input=[
+  return {
+    "model": model,
+    "temperature": 0,
+    "input": [
       {
         "role": "system",
         "content": [
@@ -319,19 +743,29 @@ def _invoke_openai(prompt: str, images: List[str], model: str) -> Any:
         "content": user_content,
       },
     ],
-  )
+  }
 
 
-def call_openai_extract(
-  document_type: str,
-  template: Dict[str, Any],
-  images: List[str],
-  model: str = DEFAULT_MODEL,
-) -> Dict[str, Any]:
+def _invoke_openai(prompt: str, images: List[str], model: str) -> Any:
   """
-  Call OpenAI ChatGPT to extract structured JSON for the given
-  document type and template.
+  Call OpenAI ChatGPT with the given prompt + images and return the response.
   """
+  client = _get_openai_client()
+  return client.responses.create(**_build_request(prompt, images, model))
+
+
+async def _invoke_openai_async(
+  client: "AsyncOpenAI",
+  semaphore: asyncio.Semaphore,
+  prompt: str,
+  images: List[str],
+  model: str,
+) -> Any:
+  async with semaphore:
+    return await client.responses.create(**_build_request(prompt, images, model))
+
+
+def _resolve_model(model: str) -> str:
   resolved_model = DEFAULT_MODEL if model == "default" else model
 
   if resolved_model not in ALLOWED_MODELS:
@@ -340,20 +774,42 @@ def call_openai_extract(
       f"Supported values: {ALLOWED_MODELS}. "
       "This extractor uses OpenAI ChatGPT models."
     )
+  return resolved_model
+
 
+def _as_data_url(image: str) -> str:
+  # Plain base64 (the legacy contract) was always JPEG.
+  return image if image.startswith("data:") else "data:image/jpeg;base64," + image
+
+
+def call_openai_extract(
+  document_type: str,
+  template: Dict[str, Any],
+  images: List[str],
+  model: str = DEFAULT_MODEL,
+) -> Dict[str, Any]:
+  """
+  Call OpenAI ChatGPT to extract structured JSON for the given
+  document type and template. `images` may be plain base64 JPEG strings
+  (as returned by pdf_bytes_to_base64_images) or data URLs (as returned by
+  pdf_to_image_data_urls).
+  """
   prompt = build_extraction_prompt(document_type, template)
+  return _extract_with_prompt(prompt, [_as_data_url(img) for img in images], model)
+
+
+# Opening fence line, body, and an optional closing fence at the very end.
+_FENCE_RE = re.compile(r"```[^\n]*\n(.*?)(?:\n```[^\n]*)?", re.DOTALL)
 
-  response = _invoke_openai(prompt, images, resolved_model)
+
+def _parse_response_json(response: Any) -> Dict[str, Any]:
   json_str = _extract_text_from_response(response).strip()
 
   # Strip optional markdown fences (```json ... ```)
   if json_str.startswith("```"):
-    lines = json_str.splitlines()
-    if lines and lines[0].lstrip().startswith("```"):
-      lines = lines[1:]
-    if lines and lines[-1].strip().startswith("```"):
-      lines = lines[:-1]
-    json_str = "\n".join(lines).strip()
+    fenced = _FENCE_RE.fullmatch(json_str)
+    if fenced:
+      json_str = fenced.group(1).strip()
 
   if not json_str:
     raise ValueError(
@@ -361,8 +817,8 @@ def call_openai_extract(
     )
 
   try:
-    return json.loads(json_str)
-  except json.JSONDecodeError as exc:
+    return orjson.loads(json_str)
+  except orjson.JSONDecodeError as exc:
     snippet = json_str[:500]
     raise ValueError(
       f"Model output was not valid JSON: {exc}. "
@@ -370,24 +826,293 @@ def call_openai_extract(
     ) from exc
 
 
+def _merge_extractions(base: Any, other: Any) -> Any:
+  """
+  Merge two partial extractions of the same template: dicts merge
+  field-by-field, lists are concatenated without duplicates, and for
+  scalars the first non-empty value wins.
+  """
+  if isinstance(base, dict) and isinstance(other, dict):
+    merged = dict(base)
+    for key, value in other.items():
+      if key in merged:
+        value = _merge_extractions(merged[key], value)
+      merged[key] = value
+    return merged
+  if isinstance(base, list) and isinstance(other, list):
+    return base + [item for item in other if item not in base]
+  return other if base in ("", None) else base
+
+
+async def _extract_chunks_async(
+  prompt: str,
+  chunks: List[List[str]],
+  model: str,
+) -> List[Dict[str, Any]]:
+  client = _get_async_openai_client()
+  semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+  responses = await asyncio.gather(
+    *(_invoke_openai_async(client, semaphore, prompt, chunk, model) for chunk in chunks)
+  )
+  return [_parse_response_json(response) for response in responses]
+
+
+def _extract_with_prompt(
+  prompt: str,
+  images: List[str],
+  model: str = DEFAULT_MODEL,
+) -> Dict[str, Any]:
+  """
+  Run the extraction prompt over the page images. With PAGES_PER_REQUEST
+  set, longer documents are split into page chunks that are sent
+  concurrently and merged back into a single result.
+  """
+  resolved_model = _resolve_model(model)
+
+  if PAGES_PER_REQUEST <= 0 or len(images) <= PAGES_PER_REQUEST:
+    return _parse_response_json(_invoke_openai(prompt, images, resolved_model))
+
+  chunks = [
+    images[i:i + PAGES_PER_REQUEST] for i in range(0, len(images), PAGES_PER_REQUEST)
+  ]
+  # Runs on the shared loop thread, so this also works when the caller is
+  # itself inside a running event loop (where asyncio.run() would raise).
+  results = asyncio.run_coroutine_threadsafe(
+    _extract_chunks_async(prompt, chunks, resolved_model),
+    _get_async_loop(),
+  ).result()
+  return functools.reduce(_merge_extractions, results)
+
+
+def _submit_batch(requests: List[Tuple[str, List[str]]], model: str) -> str:
+  """
+  Upload (prompt, images) requests as one OpenAI batch and return its id
+  without waiting for it to run.
+  """
+  client = _get_openai_client()
+
+  lines = [
+    orjson.dumps(
+      {
+        "custom_id": f"job-{index}",
+        "method": "POST",
+        "url": "/v1/responses",
+        "body": _build_request(prompt, images, model),
+      }
+    )
+    for index, (prompt, images) in enumerate(requests)
+  ]
+  batch_file = client.files.create(
+    file=("extraction_batch.jsonl", b"\n".join(lines)),
+    purpose="batch",
+  )
+  batch = client.batches.create(
+    input_file_id=batch_file.id,
+    endpoint="/v1/responses",
+    completion_window="24h",
+  )
+  return batch.id
+
+
+def _batch_errors(client: "OpenAI", batch: Any) -> Dict[str, Any]:
+  # Requests that failed outright land in the error file, not the output.
+  errors: Dict[str, Any] = {}
+  if not batch.error_file_id:
+    return errors
+  for line in client.files.content(batch.error_file_id).text.splitlines():
+    if line.strip():
+      record = orjson.loads(line)
+      response = record.get("response") or {}
+      errors[record.get("custom_id")] = record.get("error") or response.get("body")
+  return errors
+
+
+def collect_extraction_batch(
+  batch_id: str,
+  max_wait: float = 0,
+  poll_interval: float = BATCH_POLL_INTERVAL,
+) -> Optional[List[Dict[str, Any]]]:
+  """
+  Fetch the results of a batch from submit_extraction_batch, in job order.
+  Polls for up to `max_wait` seconds (0 checks once) and returns None if the
+  batch is still running, so short-lived callers can check back later.
+  """
+  client = _get_openai_client()
+  deadline = time.monotonic() + max_wait
+
+  batch = client.batches.retrieve(batch_id)
+  while batch.status not in BATCH_TERMINAL_STATUSES:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+      return None
+    time.sleep(min(poll_interval, remaining))
+    batch = client.batches.retrieve(batch_id)
+
+  results: Dict[str, Dict[str, Any]] = {}
+  failures = _batch_errors(client, batch)
+  if batch.output_file_id:
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+      if not line.strip():
+        continue
+      record = orjson.loads(line)
+      response = record.get("response") or {}
+      if response.get("status_code") != 200:
+        failures[record.get("custom_id")] = record.get("error") or response.get("body")
+        continue
+      results[record["custom_id"]] = _parse_response_json(response["body"])
+
+  if failures:
+    raise RuntimeError(f"OpenAI batch {batch_id} requests failed: {failures}")
+  if batch.status != "completed":
+    raise RuntimeError(
+      f"OpenAI batch {batch_id} ended with status '{batch.status}': "
+      f"{batch.errors}"
+    )
+
+  total = batch.request_counts.total if batch.request_counts else len(results)
+  custom_ids = [f"job-{index}" for index in range(total)]
+  missing = [custom_id for custom_id in custom_ids if custom_id not in results]
+  if missing:
+    raise RuntimeError(
+      f"OpenAI batch {batch_id} returned no output for {missing}."
+    )
+  return [results[custom_id] for custom_id in custom_ids]
+
+
+def _run_batch(
+  requests: List[Tuple[str, List[str]]],
+  model: str,
+  poll_interval: float = BATCH_POLL_INTERVAL,
+  max_wait: float = BATCH_MAX_WAIT,
+) -> List[Dict[str, Any]]:
+  """
+  Submit requests as one batch and wait up to `max_wait` seconds for the
+  results; a batch still running at the deadline is cancelled.
+  """
+  batch_id = _submit_batch(requests, model)
+  results = collect_extraction_batch(batch_id, max_wait, poll_interval)
+  if results is None:
+    _get_openai_client().batches.cancel(batch_id)
+    raise TimeoutError(
+      f"OpenAI batch {batch_id} did not finish within {max_wait:.0f}s "
+      "and was cancelled."
+    )
+  return results
+
+
+def _job_requests(
+  jobs: List[Tuple[str, Dict[str, Any], List[str]]],
+) -> List[Tuple[str, List[str]]]:
+  return [
+    (
+      build_extraction_prompt(document_type, template),
+      [_as_data_url(img) for img in images],
+    )
+    for document_type, template, images in jobs
+  ]
+
+
+def submit_extraction_batch(
+  jobs: List[Tuple[str, Dict[str, Any], List[str]]],
+  model: str = DEFAULT_MODEL,
+) -> str:
+  """
+  Batch API variant of call_openai_extract for latency-insensitive bulk
+  runs: each (document_type, template, images) job becomes one request in
+  a single OpenAI batch, with images as in call_openai_extract. Returns the
+  batch id immediately; pass it to collect_extraction_batch to fetch
+  results in job order.
+  """
+  resolved_model = _resolve_model(model)
+  return _submit_batch(_job_requests(jobs), resolved_model)
+
+
+def call_openai_extract_batch(
+  jobs: List[Tuple[str, Dict[str, Any], List[str]]],
+  model: str = DEFAULT_MODEL,
+  poll_interval: float = BATCH_POLL_INTERVAL,
+  max_wait: float = BATCH_MAX_WAIT,
+) -> List[Dict[str, Any]]:
+  """
+  Blocking form of submit_extraction_batch + collect_extraction_batch.
+  Waits at most `max_wait` seconds, then cancels the batch and raises
+  TimeoutError.
+  """
+  resolved_model = _resolve_model(model)
+  return _run_batch(_job_requests(jobs), resolved_model, poll_interval, max_wait)
+
+
+def _prepare_pdf_request(
+  pdf_bytes: Optional[bytes],
+  filename: str,
+  max_pages: int,
+  pdf: Optional["pdfium.PdfDocument"] = None,
+  pdf_path: Optional[str] = None,
+) -> Tuple[str, List[str]]:
+  # Route by filename, then render the pages for that template.
+  cfg = _match_template_config(filename)
+  prompt = _get_prompt(cfg["document_type"], cfg["template_file"])
+  images = pdf_to_image_data_urls(
+    pdf_bytes,
+    max_pages=max_pages,
+    pdf=pdf,
+    grayscale=renders_in_grayscale(filename),
+    image_format=PAGE_IMAGE_FORMAT,
+    pdf_path=pdf_path,
+  )
+  if not images:
+    raise RuntimeError("No images were extracted from PDF")
+  return prompt, images
+
+
+def submit_pdf_extraction_batch(
+  pdfs: List[Tuple[bytes, str]],
+  max_pages: int = 10,
+  model: str = DEFAULT_MODEL,
+) -> str:
+  """
+  Render several (pdf_bytes, filename) PDFs and submit them as one OpenAI
+  batch. Returns the batch id; collect_extraction_batch yields the results
+  in the same order as `pdfs`.
+  """
+  resolved_model = _resolve_model(model)
+  requests = [
+    _prepare_pdf_request(pdf_bytes, filename, max_pages)
+    for pdf_bytes, filename in pdfs
+  ]
+  return _submit_batch(requests, resolved_model)
+
+
 def extract_using_openai_from_pdf_bytes(
-  pdf_bytes: bytes,
+  pdf_bytes: Optional[bytes],
   filename: str,
   max_pages: int = 10,
   model: str = DEFAULT_MODEL,
+  batch: bool = False,
+  pdf: Optional["pdfium.PdfDocument"] = None,
+  pdf_path: Optional[str] = None,
 ) -> Dict[str, Any]:
   """
   Backwards-compatible entrypoint used by the Vision Lambda.
 
   Despite the legacy name, this now uses OpenAI ChatGPT to perform the
-  extraction while preserving the JSON contract.
+  extraction while preserving the JSON contract. batch=True sends the
+  request through the (cheaper) Batch API and waits up to BATCH_MAX_WAIT
+  seconds before cancelling; bulk callers should batch many PDFs with
+  submit_pdf_extraction_batch instead. For a PDF on disk pass
+  pdf_bytes=None and `pdf_path`. Or pass only an already-open `pdf` (with
+  pdf_bytes=None) to render from that handle in this process instead of
+  parsing the PDF again in the render workers.
   """
-  document_type, template = infer_template_from_filename(filename)
-  images = pdf_bytes_to_base64_images(pdf_bytes, max_pages=max_pages)
-  if not images:
-    raise RuntimeError("No images were extracted from PDF")
+  resolved_model = _resolve_model(model)
+  prompt, images = _prepare_pdf_request(
+    pdf_bytes, filename, max_pages, pdf=pdf, pdf_path=pdf_path
+  )
+
+  if batch:
+    return _run_batch([(prompt, images)], resolved_model)[0]
 
-  return call_openai_extract(document_type, template, images, model=model)
+  return _extract_with_prompt(prompt, images, model=resolved_model)
 
 
 def _prompt_for_pdf_path() -> str:
@@ -403,7 +1128,5 @@ def _prompt_for_pdf_path() -> str:
 
 if __name__ == "__main__":
   pdf_path = _prompt_for_pdf_path()
-  with open(pdf_path, "rb") as fh:
-    pdf_data = fh.read()
-  result = extract_using_openai_from_pdf_bytes(pdf_data, pdf_path)
+  result = extract_using_openai_from_pdf_bytes(None, pdf_path, pdf_path=pdf_path)
   print(json.dumps(result, ensure_ascii=False))
@@ -1,30 +1,61 @@
 import hashlib
-import json
+import io
 import os
+import re
 import sys
+from typing import TYPE_CHECKING
 
+import orjson
 import streamlit as st
-import pypdfium2 as pdfium
 from huggingface_hub import HfApi, hf_hub_download
 
+if TYPE_CHECKING:
+  import pypdfium2 as pdfium
+
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT_DIR not in sys.path:
   sys.path.insert(0, ROOT_DIR)
 
-from extractor import extract_using_openai_from_pdf_bytes, TEMPLATE_REGISTRY
+from extractor import (
+  OPENAI_API_KEY_ENV,
+  PDFIUM_LOCK,
+  SUPPORTED_DOCS_MD,
+  detect_template,
+  renders_in_grayscale,
+)
 
 SAMPLE_DATASET_REPO = os.getenv(
   "SAMPLE_DATASET_REPO",
   "pradyten/pdf-extractor-samples",
 )
+HAS_API_KEY = bool(os.getenv(OPENAI_API_KEY_ENV))
+HASH_CHUNK_SIZE = 256 * 1024
+PREVIEW_MAX_WIDTH = 900
+PREVIEW_QUALITY = 82
+
+_SESSION_DEFAULTS = {
+  "extract_result": None,
+  "extract_error": None,
+  "extract_digest": None,
+  "extract_filename": None,
+  "pdf_filename": None,
+  "pdf_digest": None,
+  "input_mode_prev": None,
+}
 
 
 st.set_page_config(page_title="PDF Extractor", layout="wide")
 
+# Fonts load via <link> (with a preconnect) rather than a CSS @import, which
+# would block parsing of the stylesheet until the font CSS arrives. The block
+# is emitted on every rerun: Streamlit drops elements a rerun does not
+# re-create, so a "send once" guard would strip the styles.
 st.markdown(
   """
+  <link rel="preconnect" href="https://fonts.googleapis.com">
+  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+  <link href="https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@500;700&family=Plus+Jakarta+Sans:wght@400;500;600&display=swap" rel="stylesheet">
   <style>
-  @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@500;700&family=Plus+Jakarta+Sans:wght@400;500;600&display=swap');
   :root {
     --bg-0: #f3ede4;
     --bg-1: #fbf5ea;
@@ -90,30 +121,144 @@ st.markdown(
 )
 
 
-def _render_pdf_preview(pdf_bytes: bytes) -> None:
-  pdf = None
+# A PDF source is a sample's local path or the live UploadedFile; neither is
+# copied into session state. Every in-process PDFium call holds PDFIUM_LOCK:
+# PDFium is not thread-safe, even across documents, and each session runs
+# its script on its own thread.
+@st.cache_resource(ttl=600, max_entries=16, show_spinner=False)
+def _open_pdf(file_id: str, _uploaded_file) -> "pdfium.PdfDocument":
+  # One parsed document per upload, shared by the preview and the
+  # extractor. Opened from getvalue(), the uploader's own bytes (no copy), so
+  # the cache pins those bytes rather than the live UploadedFile. Samples
+  # need no handle: their preview is cached on disk, and the extractor's
+  # render workers open them by path.
+  import pypdfium2 as pdfium
+
+  with PDFIUM_LOCK:
+    return pdfium.PdfDocument(_uploaded_file.getvalue())
+
+
+def _upload_pdf(uploaded_file) -> "pdfium.PdfDocument":
+  return _open_pdf(uploaded_file.file_id, uploaded_file)
+
+
+def _encode_preview(pdf: "pdfium.PdfDocument", grayscale: bool) -> bytes | None:
+  if len(pdf) < 1:
+    return None
+  page = pdf[0]
+  # Size the bitmap for the preview column rather than the page; PDFium
+  # allocates the whole bitmap up front, so scale drives memory directly.
+  scale = min(2.0, PREVIEW_MAX_WIDTH / page.get_width())
+  # PIL only wraps RGBX and L bitmaps without copying; plain RGB is copied.
+  bitmap = page.render(
+    scale=scale,
+    rev_byteorder=True,
+    prefer_bgrx=True,
+    grayscale=grayscale,
+  )
+  pil_image = bitmap.to_pil()
+  buffered = io.BytesIO()
+  pil_image.save(buffered, format="JPEG", quality=PREVIEW_QUALITY)
+  pil_image.close()
+  bitmap.close()
+  return buffered.getvalue()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _preview_jpeg(
+  digest: str,
+  _pdf: "pdfium.PdfDocument",
+  grayscale: bool = False,
+) -> bytes | None:
+  # Keyed on the digest alone; the open document is excluded from hashing.
+  with PDFIUM_LOCK:
+    return _encode_preview(_pdf, grayscale)
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def _sample_preview_jpeg(
+  digest: str,
+  path: str,
+  grayscale: bool = False,
+) -> bytes | None:
+  # Sample PDFs never change, so their thumbnails are persisted to disk and
+  # survive restarts; a warm sample needs no PDFium parse at all.
+  import pypdfium2 as pdfium
+
+  with PDFIUM_LOCK:
+    pdf = pdfium.PdfDocument(path)
+    try:
+      return _encode_preview(pdf, grayscale)
+    finally:
+      pdf.close()
+
+
+def _render_pdf_preview(digest: str, filename: str, source) -> None:
+  # Same colour policy as the pages sent to the model.
+  grayscale = renders_in_grayscale(filename)
   try:
-    pdf = pdfium.PdfDocument(pdf_bytes)
-    if len(pdf) < 1:
+    if isinstance(source, str):
+      preview = _sample_preview_jpeg(digest, source, grayscale)
+    else:
+      preview = _preview_jpeg(digest, _upload_pdf(source), grayscale)
+    if preview is None:
       st.info("No pages found in this PDF.")
       return
-    page = pdf[0]
-    pil_image = page.render(scale=2.0).to_pil()
-    st.image(pil_image, caption="Preview (page 1)", use_column_width=True)
+    # Pre-encoded JPEG bytes are served as-is (no PIL re-encode). Streamlit
+    # 1.29 predates st.image(use_container_width=...), so keep the column flag.
+    st.image(
+      preview,
+      caption="Preview (page 1)",
+      use_column_width=True,
+      output_format="JPEG",
+    )
   except Exception as exc:  # pragma: no cover - UI preview path
     st.warning(f"Preview unavailable: {exc}")
-  finally:
-    if pdf is not None:
-      pdf.close()
 
 
-def _load_pdf_state(uploaded_file) -> tuple[bytes, str, str]:
-  pdf_bytes = uploaded_file.getvalue()
-  digest = hashlib.sha256(pdf_bytes).hexdigest()
-  return pdf_bytes, uploaded_file.name, digest
+def _new_hasher(data: bytes = b""):
+  # Digests only detect "is this the same PDF as before" across reruns, so a
+  # fast 128-bit BLAKE2b is plenty; no cryptographic strength is needed.
+  return hashlib.blake2b(data, digest_size=16)
+
+
+def _bytes_key(data: bytes) -> str:
+  return _new_hasher(data).hexdigest()
+
+
+def _cache_key(fh) -> str:
+  # For files on disk: hashlib.file_digest streams them through one reused
+  # buffer; mirror that on Python 3.10. (Not for in-memory uploads, where
+  # file_digest's getbuffer() would unshare and copy the whole BytesIO.)
+  if hasattr(hashlib, "file_digest"):
+    return hashlib.file_digest(fh, _new_hasher).hexdigest()
+  digest = _new_hasher()
+  buf = bytearray(HASH_CHUNK_SIZE)
+  view = memoryview(buf)
+  fh.seek(0)
+  while size := fh.readinto(buf):
+    digest.update(view[:size])
+  return digest.hexdigest()
 
 
 @st.cache_data(show_spinner=False)
+def _upload_digest(file_id: str, _uploaded_file) -> str:
+  # file_id is stable for one upload, so the bytes are hashed only once.
+  # getvalue() hands back the uploader's bytes object itself, no copy.
+  return _bytes_key(_uploaded_file.getvalue())
+
+
+def _load_pdf_state(uploaded_file) -> tuple[str, str]:
+  # Hashes getvalue(), the uploader's own bytes; getbuffer() would copy them.
+  digest = _upload_digest(uploaded_file.file_id, uploaded_file)
+  # Parse (or fetch the cached handle) up front so a corrupt upload fails
+  # here, visibly, instead of later inside the preview.
+  _upload_pdf(uploaded_file)
+  return uploaded_file.name, digest
+
+
+# Short TTL so samples added to the dataset show up without a restart.
+@st.cache_data(ttl=300, show_spinner=False)
 def _list_sample_pdfs(repo_id: str) -> list[str]:
   api = HfApi()
   try:
@@ -123,58 +268,88 @@ def _list_sample_pdfs(repo_id: str) -> list[str]:
   return sorted(name for name in files if name.lower().endswith(".pdf"))
 
 
-@st.cache_data(show_spinner=False)
-def _load_sample_state(repo_id: str, filename: str) -> tuple[bytes, str, str]:
-  path = hf_hub_download(repo_id=repo_id, filename=filename, repo_type="dataset")
+# Not persisted (persisted caches ignore ttl): every few minutes
+# hf_hub_download re-checks the dataset revision, and a new revision lands
+# at a new snapshot path.
+@st.cache_data(ttl=300, show_spinner=False)
+def _download_sample(repo_id: str, filename: str) -> str:
+  return hf_hub_download(repo_id=repo_id, filename=filename, repo_type="dataset")
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def _sample_digest(path: str, mtime: float) -> str:
+  # Keyed on the snapshot path (new revision, new path) plus mtime, so each
+  # downloaded file is hashed once, even across restarts.
   with open(path, "rb") as fh:
-    pdf_bytes = fh.read()
-  digest = hashlib.sha256(pdf_bytes).hexdigest()
-  return pdf_bytes, filename, digest
+    return _cache_key(fh)
+
+
+def _load_sample_state(repo_id: str, filename: str) -> tuple[str, str, str]:
+  # Only the local path and digest are cached; a rerun on the same sample
+  # costs one stat() call.
+  path = _download_sample(repo_id, filename)
+  try:
+    mtime = os.stat(path).st_mtime
+  except FileNotFoundError:
+    # The cached path outlived the HF download cache; fetch again.
+    _download_sample.clear()
+    path = _download_sample(repo_id, filename)
+    mtime = os.stat(path).st_mtime
+  return path, filename, _sample_digest(path, mtime)
+
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _extract_cached(digest: str, filename: str, model: str, _source) -> dict:
+  # The leading underscore keeps Streamlit from hashing the PDF source; the
+  # digest already identifies it. The extractor's OpenAI stack is only
+  # imported once someone actually extracts.
+  from extractor import extract_using_openai_from_pdf_bytes
+
+  if isinstance(_source, str):
+    # Samples: render workers open the file by path, in parallel.
+    return extract_using_openai_from_pdf_bytes(
+      None, filename, model=model, pdf_path=_source
+    )
+  # Uploads: render from the already-parsed handle in this process rather
+  # than pickling the bytes to every worker and parsing them again there.
+  return extract_using_openai_from_pdf_bytes(
+    None, filename, model=model, pdf=_upload_pdf(_source)
+  )
+
+
+# Anything other than alphanumerics (Unicode-aware), "-" or "_".
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w-]")
 
 
 def _build_download_name(filename: str) -> str:
   base = os.path.splitext(filename)[0] if filename else "extraction"
-  safe = "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in base)
+  safe = _UNSAFE_FILENAME_CHARS.sub("_", base)
   if not safe:
     safe = "extraction"
   return f"{safe}_extracted.json"
 
 
+def _set_pdf_state(filename: str | None, digest: str | None) -> None:
+  # Shared by the reset and new-PDF paths. SessionStateProxy has no batched
+  # write: update() still sets each key through __setitem__.
+  st.session_state.update(
+    {
+      "pdf_filename": filename,
+      "pdf_digest": digest,
+      "extract_result": None,
+      "extract_error": None,
+      "extract_digest": digest,
+      "extract_filename": filename,
+    }
+  )
+
+
 def _reset_pdf_state() -> None:
-  st.session_state.pdf_bytes = None
-  st.session_state.pdf_filename = None
-  st.session_state.pdf_digest = None
-  st.session_state.extract_result = None
-  st.session_state.extract_error = None
-  st.session_state.extract_digest = None
-  st.session_state.extract_filename = None
-
-
-def _supported_doc_types() -> list[str]:
-  seen = []
-  for cfg in TEMPLATE_REGISTRY.values():
-    doc_type = cfg.get("document_type")
-    if doc_type and doc_type not in seen:
-      seen.append(doc_type)
-  return seen
-
-
-if "extract_result" not in st.session_state:
-  st.session_state.extract_result = None
-if "extract_error" not in st.session_state:
-  st.session_state.extract_error = None
-if "extract_digest" not in st.session_state:
-  st.session_state.extract_digest = None
-if "extract_filename" not in st.session_state:
-  st.session_state.extract_filename = None
-if "pdf_bytes" not in st.session_state:
-  st.session_state.pdf_bytes = None
-if "pdf_filename" not in st.session_state:
-  st.session_state.pdf_filename = None
-if "pdf_digest" not in st.session_state:
-  st.session_state.pdf_digest = None
-if "input_mode_prev" not in st.session_state:
-  st.session_state.input_mode_prev = None
+  _set_pdf_state(None, None)
+
+
+for _key, _value in _SESSION_DEFAULTS.items():
+  st.session_state.setdefault(_key, _value)
 
 
 st.markdown("## PDF Extractor")
@@ -200,6 +375,7 @@ with left:
 
   selected_sample = None
   uploaded_file = None
+  pdf_source = None
 
   if input_mode == "Use sample":
     sample_files = _list_sample_pdfs(SAMPLE_DATASET_REPO)
@@ -228,37 +404,40 @@ with left:
 
   if input_mode == "Use sample" and selected_sample:
     try:
-      pdf_bytes, filename, digest = _load_sample_state(
+      sample_path, filename, digest = _load_sample_state(
         SAMPLE_DATASET_REPO,
         selected_sample,
       )
     except Exception as exc:  # pragma: no cover - sample load path
       st.error(f"Sample load failed: {exc}")
     else:
+      pdf_source = sample_path
       if st.session_state.pdf_digest != digest:
-        st.session_state.pdf_bytes = pdf_bytes
-        st.session_state.pdf_filename = filename
-        st.session_state.pdf_digest = digest
-        st.session_state.extract_result = None
-        st.session_state.extract_error = None
-        st.session_state.extract_digest = digest
-        st.session_state.extract_filename = filename
+        _set_pdf_state(filename, digest)
 
       st.markdown(f"**Sample:** `{st.session_state.pdf_filename}`")
-      _render_pdf_preview(st.session_state.pdf_bytes)
+      _render_pdf_preview(
+        st.session_state.pdf_digest,
+        st.session_state.pdf_filename,
+        pdf_source,
+      )
   elif input_mode == "Upload PDF" and uploaded_file is not None:
-    pdf_bytes, filename, digest = _load_pdf_state(uploaded_file)
-    if st.session_state.pdf_digest != digest:
-      st.session_state.pdf_bytes = pdf_bytes
-      st.session_state.pdf_filename = filename
-      st.session_state.pdf_digest = digest
-      st.session_state.extract_result = None
-      st.session_state.extract_error = None
-      st.session_state.extract_digest = digest
-      st.session_state.extract_filename = filename
-
-    st.markdown(f"**File:** `{st.session_state.pdf_filename}`")
-    _render_pdf_preview(st.session_state.pdf_bytes)
+    try:
+      filename, digest = _load_pdf_state(uploaded_file)
+    except Exception as exc:  # pragma: no cover - upload load path
+      _reset_pdf_state()
+      st.error(f"Could not open this PDF: {exc}")
+    else:
+      pdf_source = uploaded_file
+      if st.session_state.pdf_digest != digest:
+        _set_pdf_state(filename, digest)
+
+      st.markdown(f"**File:** `{st.session_state.pdf_filename}`")
+      _render_pdf_preview(
+        st.session_state.pdf_digest,
+        st.session_state.pdf_filename,
+        pdf_source,
+      )
   else:
     st.info("Upload a PDF or choose a sample to preview it here.")
 
@@ -270,7 +449,7 @@ with left:
   )
   st.caption(f"Sample dataset: `{SAMPLE_DATASET_REPO}`")
   st.markdown("#### Supported documents")
-  st.markdown("\n".join(f"- {doc}" for doc in _supported_doc_types()))
+  st.markdown(SUPPORTED_DOCS_MD)
 
 with right:
   st.markdown("### Extract")
@@ -281,23 +460,36 @@ with right:
     help="Choose a model or use default (EXTRACTOR_MODEL_ALIAS).",
   )
 
-  has_api_key = bool(os.getenv("OPENAI_API_KEY"))
-  if not has_api_key:
-    st.warning("OPENAI_API_KEY is not set. Add it to your environment or Space secrets.")
+  if not HAS_API_KEY:
+    st.warning(
+      f"{OPENAI_API_KEY_ENV} is not set. Add it to your environment or Space secrets."
+    )
+
+  template_keyword = (
+    detect_template(st.session_state.pdf_filename)
+    if pdf_source is not None
+    else None
+  )
+  if pdf_source is not None and template_keyword is None:
+    st.warning(
+      "No template matches this file name. Rename it to include a known "
+      "keyword (for example: resume, passport, i129)."
+    )
 
   extract_clicked = st.button(
     "Extract",
     use_container_width=False,
-    disabled=st.session_state.pdf_bytes is None or not has_api_key,
+    disabled=template_keyword is None or not HAS_API_KEY,
   )
 
   if extract_clicked:
     with st.spinner("Extracting structured JSON..."):
       try:
-        result = extract_using_openai_from_pdf_bytes(
-          st.session_state.pdf_bytes,
+        result = _extract_cached(
+          st.session_state.pdf_digest,
           st.session_state.pdf_filename,
-          model=model_choice,
+          model_choice,
+          pdf_source,
         )
         st.session_state.extract_result = result
         st.session_state.extract_error = None
@@ -318,15 +510,16 @@ with right:
     st.info("Extraction output will appear here.")
   else:
     st.markdown("#### JSON Output")
-    json_text = json.dumps(
+    # orjson yields UTF-8 bytes, which the download button takes as-is; only
+    # the code view needs a decoded str.
+    json_bytes = orjson.dumps(
       st.session_state.extract_result,
-      indent=2,
-      ensure_ascii=False,
+      option=orjson.OPT_INDENT_2,
     )
-    st.code(json_text, language="json")
+    st.code(json_bytes.decode("utf-8"), language="json")
     st.download_button(
       "Download JSON",
-      data=json_text,
+      data=json_bytes,
       file_name=_build_download_name(st.session_state.pdf_filename or ""),
       mime="application/json",
     )
@@ -0,0 +1,152 @@
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+import extractor
+
+
+def _body(text):
+  # Raw Responses API body, as it appears in batch output files.
+  return {"output": [{"content": [{"type": "output_text", "text": text}]}]}
+
+
+class FakeFiles:
+  def __init__(self):
+    self.contents = {}
+
+  def create(self, file, purpose):
+    name, data = file
+    self.contents["input"] = data.decode()
+    return SimpleNamespace(id="input")
+
+  def content(self, file_id):
+    return SimpleNamespace(text=self.contents[file_id])
+
+
+class FakeBatches:
+  def __init__(self, statuses, **final):
+    self.statuses = list(statuses)
+    self.final = final
+    self.created = None
+    self.cancelled = []
+
+  def create(self, **kwargs):
+    self.created = kwargs
+    return SimpleNamespace(id="batch-1")
+
+  def retrieve(self, batch_id):
+    status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+    fields = {
+      "output_file_id": None,
+      "error_file_id": None,
+      "request_counts": None,
+      "errors": None,
+    }
+    fields.update(self.final)
+    return SimpleNamespace(id=batch_id, status=status, **fields)
+
+  def cancel(self, batch_id):
+    self.cancelled.append(batch_id)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+  def install(statuses, outputs=None, errors=None, total=None, **final):
+    files = FakeFiles()
+    if outputs is not None:
+      files.contents["output"] = "\n".join(orjson.dumps(o).decode() for o in outputs)
+      final.setdefault("output_file_id", "output")
+    if errors is not None:
+      files.contents["errors"] = "\n".join(orjson.dumps(e).decode() for e in errors)
+      final.setdefault("error_file_id", "errors")
+    if total is not None:
+      final["request_counts"] = SimpleNamespace(total=total)
+    client = SimpleNamespace(files=files, batches=FakeBatches(statuses, **final))
+    monkeypatch.setattr(extractor, "_get_openai_client", lambda: client)
+    monkeypatch.setattr(extractor.time, "sleep", lambda seconds: None)
+    return client
+
+  return install
+
+
+def _ok(custom_id, text):
+  return {
+    "custom_id": custom_id,
+    "response": {"status_code": 200, "body": _body(text)},
+  }
+
+
+def test_submit_writes_one_request_per_job(fake_client):
+  client = fake_client(["validating"])
+  batch_id = extractor._submit_batch(
+    [("prompt a", ["data:image/jpeg;base64,AAAA"]), ("prompt b", [])],
+    "gpt-4.1-mini",
+  )
+
+  assert batch_id == "batch-1"
+  assert client.batches.created["endpoint"] == "/v1/responses"
+  lines = [orjson.loads(line) for line in client.files.contents["input"].splitlines()]
+  assert [line["custom_id"] for line in lines] == ["job-0", "job-1"]
+  assert lines[0]["body"]["model"] == "gpt-4.1-mini"
+  user_content = lines[0]["body"]["input"][1]["content"]
+  assert user_content[1] == {
+    "type": "input_image",
+    "image_url": "data:image/jpeg;base64,AAAA",
+  }
+
+
+def test_collect_returns_results_in_job_order(fake_client):
+  fake_client(
+    ["in_progress", "completed"],
+    outputs=[_ok("job-1", '{"b": 2}'), _ok("job-0", '{"a": 1}')],
+    total=2,
+  )
+  assert extractor.collect_extraction_batch("batch-1", max_wait=60) == [
+    {"a": 1},
+    {"b": 2},
+  ]
+
+
+def test_collect_returns_none_while_running(fake_client):
+  fake_client(["in_progress"])
+  assert extractor.collect_extraction_batch("batch-1", max_wait=0) is None
+
+
+def test_collect_reports_error_file(fake_client):
+  fake_client(
+    ["completed"],
+    outputs=[_ok("job-0", '{"a": 1}')],
+    errors=[{"custom_id": "job-1", "error": {"message": "image too large"}}],
+    total=2,
+  )
+  with pytest.raises(RuntimeError, match="image too large"):
+    extractor.collect_extraction_batch("batch-1")
+
+
+def test_collect_reports_failed_batch(fake_client):
+  fake_client(["failed"], errors=[])
+  with pytest.raises(RuntimeError, match="status 'failed'"):
+    extractor.collect_extraction_batch("batch-1")
+
+
+def test_collect_reports_missing_output(fake_client):
+  fake_client(["completed"], outputs=[_ok("job-0", '{"a": 1}')], total=2)
+  with pytest.raises(RuntimeError, match="no output for \\['job-1'\\]"):
+    extractor.collect_extraction_batch("batch-1")
+
+
+def test_run_batch_cancels_after_max_wait(fake_client, monkeypatch):
+  client = fake_client(["in_progress"])
+  clock = iter([0.0, 0.0, 5.0, 11.0])
+  monkeypatch.setattr(extractor.time, "monotonic", lambda: next(clock))
+
+  with pytest.raises(TimeoutError, match="was cancelled"):
+    extractor._run_batch([("prompt", [])], "gpt-4.1-mini", poll_interval=5, max_wait=10)
+  assert client.batches.cancelled == ["batch-1"]
+
+
+def test_run_batch_does_not_cancel_finished_batch(fake_client):
+  client = fake_client(["completed"], outputs=[_ok("job-0", '{"a": 1}')], total=1)
+  assert extractor._run_batch([("prompt", [])], "gpt-4.1-mini") == [{"a": 1}]
+  assert client.batches.cancelled == []
@@ -0,0 +1,60 @@
+import functools
+
+from extractor import _merge_extractions
+
+
+def test_dicts_merge_field_by_field():
+  base = {"name": "Jane", "dob": ""}
+  other = {"dob": "1990-01-01", "nationality": "IN"}
+  assert _merge_extractions(base, other) == {
+    "name": "Jane",
+    "dob": "1990-01-01",
+    "nationality": "IN",
+  }
+
+
+def test_first_non_empty_scalar_wins():
+  assert _merge_extractions("A123", "B456") == "A123"
+  assert _merge_extractions("", "B456") == "B456"
+  assert _merge_extractions(None, "B456") == "B456"
+  assert _merge_extractions("A123", "") == "A123"
+
+
+def test_lists_concatenate_without_duplicates():
+  base = [{"employer": "Acme"}, {"employer": "Globex"}]
+  other = [{"employer": "Globex"}, {"employer": "Initech"}]
+  assert _merge_extractions(base, other) == [
+    {"employer": "Acme"},
+    {"employer": "Globex"},
+    {"employer": "Initech"},
+  ]
+
+
+def test_nested_structures_merge_recursively():
+  base = {"petitioner": {"name": "Acme", "fein": ""}, "pages": [1]}
+  other = {"petitioner": {"name": "", "fein": "12-3456789"}, "pages": [2]}
+  assert _merge_extractions(base, other) == {
+    "petitioner": {"name": "Acme", "fein": "12-3456789"},
+    "pages": [1, 2],
+  }
+
+
+def test_inputs_are_not_mutated():
+  base = {"a": {"b": ""}, "c": [1]}
+  other = {"a": {"b": "x"}, "c": [2]}
+  _merge_extractions(base, other)
+  assert base == {"a": {"b": ""}, "c": [1]}
+  assert other == {"a": {"b": "x"}, "c": [2]}
+
+
+def test_reduce_over_chunk_results():
+  chunks = [
+    {"name": "Jane", "courses": ["Math"], "gpa": ""},
+    {"name": "", "courses": ["Physics"], "gpa": ""},
+    {"name": "", "courses": ["Math", "Art"], "gpa": "3.9"},
+  ]
+  assert functools.reduce(_merge_extractions, chunks) == {
+    "name": "Jane",
+    "courses": ["Math", "Physics", "Art"],
+    "gpa": "3.9",
+  }
@@ -0,0 +1,122 @@
+import base64
+import io
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+pdfium = pytest.importorskip("pypdfium2")
+pytest.importorskip("PIL")
+
+import extractor
+
+
+def _make_pdf(page_count=2):
+  # Blank in-memory PDF; no fixture files needed.
+  pdf = pdfium.PdfDocument.new()
+  for _ in range(page_count):
+    pdf.new_page(200, 300)
+  out = io.BytesIO()
+  pdf.save(out)
+  pdf.close()
+  return out.getvalue()
+
+
+def _decode(data_url):
+  header, _, payload = data_url.partition(",")
+  return header, base64.b64decode(payload)
+
+
+@pytest.fixture
+def pdf():
+  doc = pdfium.PdfDocument(_make_pdf())
+  yield doc
+  doc.close()
+
+
+@pytest.mark.parametrize("image_format", ["JPEG", "WEBP"])
+def test_encode_page_returns_data_url(pdf, image_format):
+  data_url = extractor._encode_page(pdf[0], 1.0, 60, False, image_format, io.BytesIO())
+  header, payload = _decode(data_url)
+  assert header == f"data:{extractor.IMAGE_FORMATS[image_format]['mime_type']};base64"
+  assert payload
+
+
+def test_reused_buffer_drops_previous_tail(pdf):
+  expected = extractor._encode_page(pdf[0], 1.0, 60, True, "JPEG", io.BytesIO())
+
+  # A larger previous page left in the scratch buffer must not leak into
+  # the next image.
+  buffered = io.BytesIO(b"\xff" * 500_000)
+  buffered.seek(0, io.SEEK_END)
+  assert extractor._encode_page(pdf[0], 1.0, 60, True, "JPEG", buffered) == expected
+  assert len(buffered.getvalue()) == len(_decode(expected)[1])
+
+
+class _TruncateSpy(io.BytesIO):
+  def __init__(self, *args):
+    super().__init__(*args)
+    self.truncated_at = []
+
+  def truncate(self, size=None):
+    self.truncated_at.append(self.tell())
+    return super().truncate(size)
+
+
+def test_reused_buffer_truncates_after_writing(pdf):
+  # Truncating at position 0 (before the save) would free the buffer's
+  # allocation, so every page would regrow it from zero.
+  buffered = _TruncateSpy(b"\xff" * 500_000)
+  data_url = extractor._encode_page(pdf[0], 1.0, 60, False, "JPEG", buffered)
+  assert buffered.truncated_at == [len(_decode(data_url)[1])]
+
+
+def test_open_handle_renders_in_process(pdf, monkeypatch):
+  monkeypatch.setattr(extractor, "RENDER_WORKERS", 4)
+
+  def no_pool():
+    raise AssertionError("a supplied handle must not be re-parsed in workers")
+
+  monkeypatch.setattr(extractor, "_get_render_pool", no_pool)
+  images = extractor.pdf_to_image_data_urls(None, pdf=pdf)
+  assert len(images) == 2
+  assert len(pdf) == 2  # left open for the caller
+
+
+def test_legacy_helper_returns_plain_base64():
+  images = extractor.pdf_bytes_to_base64_images(_make_pdf(1))
+  assert len(images) == 1
+  assert not images[0].startswith("data:")
+  assert base64.b64decode(images[0])[:2] == b"\xff\xd8"  # JPEG SOI marker
+  assert extractor._as_data_url(images[0]).startswith("data:image/jpeg;base64,")
+
+
+def test_requires_exactly_one_source():
+  with pytest.raises(ValueError, match="exactly one"):
+    extractor.pdf_to_image_data_urls(None)
+  with pytest.raises(ValueError, match="exactly one"):
+    extractor.pdf_to_image_data_urls(b"%PDF", pdf_path="x.pdf")
+
+
+class _BrokenPool:
+  def __init__(self):
+    self.shutdowns = 0
+
+  def submit(self, *args, **kwargs):
+    raise BrokenProcessPool("worker died")
+
+  def shutdown(self, **kwargs):
+    self.shutdowns += 1
+
+
+def test_broken_pool_retries_once_then_raises(monkeypatch):
+  pools = []
+
+  def new_pool():
+    pools.append(_BrokenPool())
+    return pools[-1]
+
+  monkeypatch.setattr(extractor, "RENDER_WORKERS", 2)
+  monkeypatch.setattr(extractor, "_get_render_pool", new_pool)
+  with pytest.raises(RuntimeError, match="rendering worker crashed"):
+    extractor.pdf_to_image_data_urls(_make_pdf(2))
+  assert [pool.shutdowns for pool in pools] == [1, 1]
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+
+from extractor import _extract_text_from_response, _parse_response_json
+
+
+def _sdk_response(*texts, output_text=None):
+  # Mimics SDK objects: attributes only, no dict access.
+  blocks = [SimpleNamespace(type="output_text", text=text) for text in texts]
+  return SimpleNamespace(
+    output_text=output_text,
+    output=[SimpleNamespace(content=blocks)],
+  )
+
+
+def test_output_text_wins():
+  response = _sdk_response("ignored", output_text='  {"a": 1} ')
+  assert _extract_text_from_response(response) == '{"a": 1}'
+
+
+def test_sdk_blocks_are_joined():
+  response = _sdk_response('{"a": ', "1}")
+  assert _extract_text_from_response(response) == '{"a": 1}'
+
+
+def test_raw_dict_body():
+  body = {
+    "output": [
+      {"type": "reasoning", "content": None},
+      {
+        "content": [
+          {"type": "output_text", "text": '{"a": '},
+          {"type": "refusal", "refusal": "no"},
+          {"type": "text", "text": "1}"},
+        ]
+      },
+    ]
+  }
+  assert _extract_text_from_response(body) == '{"a": 1}'
+
+
+def test_missing_output_is_empty():
+  assert _extract_text_from_response(SimpleNamespace()) == ""
+  assert _extract_text_from_response({}) == ""
+
+
+@pytest.mark.parametrize(
+  "text",
+  [
+    '{"a": 1}',
+    '```json\n{"a": 1}\n```',
+    '```\n{"a": 1}\n```',
+    '```json\n{"a": 1}',
+    '\n```JSON \n{"a": 1}\n```\n',
+  ],
+)
+def test_parse_strips_optional_fences(text):
+  assert _parse_response_json(_sdk_response(text)) == {"a": 1}
+
+
+def test_parse_keeps_inner_backticks():
+  text = '```json\n{"code": "```x```"}\n```'
+  assert _parse_response_json(_sdk_response(text)) == {"code": "```x```"}
+
+
+def test_parse_rejects_empty_response():
+  with pytest.raises(ValueError, match="did not contain any text"):
+    _parse_response_json(_sdk_response("```json\n\n```"))
+
+
+def test_parse_rejects_invalid_json():
+  with pytest.raises(ValueError, match="not valid JSON"):
+    _parse_response_json(_sdk_response("Sure! Here is the JSON"))
@@ -0,0 +1,55 @@
+import pytest
+
+from extractor import (
+  TEMPLATE_REGISTRY,
+  detect_template,
+  infer_template_from_filename,
+)
+
+
+@pytest.mark.parametrize(
+  "filename, keyword, template_file",
+  [
+    # Examples from the infer_template_from_filename docstring.
+    ("I129 HALF.pdf", "i129", "i129_h1b_petition.json"),
+    ("passport_rohan.pdf", "passport", "passport.json"),
+    ("F1_visa_page1.pdf", "visa", "us_visa.json"),
+    ("i94_record.pdf", "i94", "i_94.json"),
+    # Only the basename is matched, case-insensitively.
+    ("/tmp/i129/Resume.PDF", "resume", "resume.json"),
+  ],
+)
+def test_docstring_examples(filename, keyword, template_file):
+  assert detect_template(filename) == keyword
+  document_type, template = infer_template_from_filename(filename)
+  assert TEMPLATE_REGISTRY[keyword]["template_file"] == template_file
+  assert document_type == TEMPLATE_REGISTRY[keyword]["document_type"]
+  assert isinstance(template, dict)
+
+
+@pytest.mark.parametrize(
+  "filename, keyword",
+  [
+    # Overlapping keywords: the longest (most specific) keyword wins.
+    ("visa_i94.pdf", "visa"),
+    ("proof_of_i20.pdf", "proof"),
+    ("employment_letter_acme.pdf", "employment_letter"),
+    ("acme offer letter.pdf", "offer letter"),
+    ("marriage_certificate.pdf", "marriage_certificate"),
+    ("fein_tax_2023.pdf", "fein"),
+  ],
+)
+def test_overlapping_keywords_prefer_longest(filename, keyword):
+  assert detect_template(filename) == keyword
+
+
+def test_equal_length_ties_keep_registry_order():
+  # "i129" and "i-94"/"i-20" are all four characters; registry order decides.
+  assert detect_template("i129_i-94.pdf") == "i129"
+
+
+def test_unknown_filename():
+  assert detect_template("scan_0001.pdf") is None
+  assert detect_template("") is None
+  with pytest.raises(ValueError, match="Could not infer document type"):
+    infer_template_from_filename("scan_0001.pdf")